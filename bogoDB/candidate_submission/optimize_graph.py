@@ -2,11 +2,12 @@
 import json
 import os
 import sys
-import random
 import numpy as np
-import statistics
-from collections import defaultdict, Counter
-from typing import Dict, List, Tuple, Any
+
+try:
+    import orjson
+except ImportError:  # Optional; fall back to the stdlib json module
+    orjson = None
 
 # Add project root to path to import scripts
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -23,6 +24,9 @@ from scripts.constants import (
 
 def load_graph(graph_file):
     """Load graph from a JSON file."""
+    if orjson is not None:
+        with open(graph_file, "rb") as f:
+            return orjson.loads(f.read())
     with open(graph_file, "r") as f:
         return json.load(f)
 
@@ -34,13 +38,124 @@ def load_results(results_file):
 
 
 def save_graph(graph, output_file):
-    """Save graph to a JSON file."""
+    """
+    Save graph to a JSON file.
+
+    Int keys and NumPy scalar weights are accepted with or without orjson.
+    NaN weights are written as NaN by the json fallback but as null by
+    orjson, so they should be rejected before saving.
+    """
+    if orjson is not None:
+        options = (
+            orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+        with open(output_file, "wb") as f:
+            f.write(orjson.dumps(graph, option=options))
+        return
     with open(output_file, "w") as f:
         json.dump(graph, f, indent=2)
 
 
+def edges_to_csr(sources, targets, edge_weights, num_nodes=NUM_NODES):
+    """
+    Pack parallel (source, target, weight) edge arrays into CSR arrays.
+
+    Edges of node v end up in indices[indptr[v]:indptr[v + 1]], keeping
+    the relative order in which they were given.
+    """
+    order = np.argsort(sources, kind="stable")
+    indptr = np.zeros(num_nodes + 1, dtype=np.int32)
+    np.cumsum(np.bincount(sources, minlength=num_nodes), out=indptr[1:])
+    indices = np.ascontiguousarray(targets[order], dtype=np.int32)
+    weights = np.ascontiguousarray(edge_weights[order], dtype=np.float64)
+    return indptr, indices, weights
+
+
+def graph_to_csr(graph, num_nodes=NUM_NODES):
+    """
+    Convert a nested-dict graph into CSR arrays.
+
+    Args:
+        graph: Graph adjacency list keyed by node ID strings
+        num_nodes: Number of nodes in the graph
+
+    Returns:
+        Tuple of (indptr, indices, weights)
+
+    Raises:
+        ValueError: If a node ID is not an int in range(num_nodes) or an
+            edge weight is not a real number
+    """
+    sources = []
+    targets = []
+    edge_weights = []
+    for node, edges in graph.items():
+        try:
+            source = int(node)
+        except (TypeError, ValueError):
+            source = -1
+        if not 0 <= source < num_nodes:
+            raise ValueError(f"Graph has invalid node ID {node!r}")
+
+        for target, weight in edges.items():
+            try:
+                target_id = int(target)
+            except (TypeError, ValueError):
+                target_id = -1
+            if not 0 <= target_id < num_nodes:
+                raise ValueError(f"Graph has invalid node ID {target!r}")
+
+            # NumPy would silently turn None into NaN and "1" into 1.0
+            if not isinstance(weight, (int, float, np.integer, np.floating)):
+                raise ValueError(
+                    f"Edge {node} -> {target} has non-numeric weight {weight!r}"
+                )
+
+            sources.append(source)
+            targets.append(target_id)
+            edge_weights.append(weight)
+
+    return edges_to_csr(
+        np.array(sources, dtype=np.int32),
+        np.array(targets, dtype=np.int32),
+        np.array(edge_weights, dtype=np.float64),
+        num_nodes,
+    )
+
+
+def csr_to_graph(indptr, indices, weights):
+    """
+    Convert CSR arrays back into the nested-dict graph format.
+
+    Args:
+        indptr: Row offsets, length num_nodes + 1
+        indices: Edge targets, grouped by source node
+        weights: Edge weights, aligned with indices
+
+    Returns:
+        Graph adjacency list keyed by node ID strings
+    """
+    # Stringify each node ID once and reuse it for every edge into that node
+    node_ids = [str(node) for node in range(len(indptr) - 1)]
+    targets = [node_ids[target] for target in indices.tolist()]
+    edge_weights = weights.tolist()
+    bounds = indptr.tolist()
+
+    graph = {}
+    for node, node_id in enumerate(node_ids):
+        start, end = bounds[node], bounds[node + 1]
+        graph[node_id] = dict(zip(targets[start:end], edge_weights[start:end]))
+    return graph
+
+
 def verify_constraints(graph, max_edges_per_node, max_total_edges):
-    """Verify that the graph meets all constraints."""
+    """
+    Verify that a nested-dict graph meets all constraints.
+
+    This walks the dict directly rather than converting to CSR, which would
+    cost more than the checks themselves; see verify_constraints_csr for
+    graphs that are already in CSR form.
+    """
     # Check total edges
     total_edges = sum(len(edges) for edges in graph.values())
     if total_edges > max_total_edges:
@@ -65,13 +180,57 @@ def verify_constraints(graph, max_edges_per_node, max_total_edges):
     # Check edge weights are valid (between 0 and 10)
     for node, edges in graph.items():
         for target, weight in edges.items():
-            if weight <= 0 or weight > 10:
-                print(f"WARNING: Edge {node} -> {target} has invalid weight {weight}")
+            try:
+                is_valid = 0 < weight <= 10
+            except TypeError:
+                is_valid = False
+            if not is_valid:
+                print(f"WARNING: Edge {node} -> {target} has invalid weight {weight!r}")
                 return False
 
     return True
 
 
+def verify_constraints_csr(
+    indptr, indices, weights, max_edges_per_node, max_total_edges
+):
+    """Verify that a graph in CSR form meets all constraints."""
+    # Check all nodes are present
+    num_nodes = len(indptr) - 1
+    if num_nodes != NUM_NODES:
+        print(f"WARNING: Graph has {num_nodes} nodes, should have {NUM_NODES}")
+        return False
+
+    # Check total edges
+    total_edges = int(indptr[-1])
+    if total_edges > max_total_edges:
+        print(
+            f"WARNING: Graph has {total_edges} edges, exceeding limit of {max_total_edges}"
+        )
+        return False
+
+    # Check max edges per node
+    degrees = np.diff(indptr)
+    max_node_edges = int(degrees.max())
+    if max_node_edges > max_edges_per_node:
+        print(
+            f"WARNING: A node has {max_node_edges} edges, exceeding limit of {max_edges_per_node}"
+        )
+        return False
+
+    # Check edge weights are valid (between 0 and 10)
+    invalid = (weights <= 0) | (weights > 10)
+    if invalid.any():
+        edge = int(np.argmax(invalid))
+        node = int(np.searchsorted(indptr, edge, side="right")) - 1
+        print(
+            f"WARNING: Edge {node} -> {indices[edge]} has invalid weight {weights[edge]}"
+        )
+        return False
+
+    return True
+
+
 def optimize_graph(
     initial_graph,
     results,
@@ -100,43 +259,50 @@ def optimize_graph(
     
     # Simple sequential ordering (0-1-2-3-4...)
     # This performs best based on testing different interleaved patterns
-    loop = list(range(num_nodes))
+    loop = np.arange(num_nodes, dtype=np.int32)
     
-    # Build graph from single loop with top-100 shortcuts
-    optimized_graph = {str(i): {} for i in range(num_nodes)}
-    top100_nodes = set(range(100))  # Nodes 0-99 are important
+    # Build graph from single loop with top-100 shortcuts, collected as
+    # parallel edge arrays and packed into CSR once at the end
+    is_top100 = np.zeros(num_nodes, dtype=bool)
+    is_top100[:100] = True  # Nodes 0-99 are important
     
-    # Add edges: next node and/or next top-100 node
-    for i in range(num_nodes):
-        source = loop[i]
-        next_node = loop[(i + 1) % num_nodes]
-        
-        # If next node is top-100, use higher weight
-        if next_node in top100_nodes:
-            optimized_graph[str(source)][str(next_node)] = 1.0
-        else:
-            # Next node is not top-100, add it with low weight
-            optimized_graph[str(source)][str(next_node)] = 0.1
-            
-            # Also find and add next top-100 node
-            for j in range(2, num_nodes):
-                next_top100 = loop[(i + j) % num_nodes]
-                if next_top100 in top100_nodes:
-                    optimized_graph[str(source)][str(next_top100)] = 1.0
-                    break
+    # Edge weight depends only on the target: 1.0 into top-100, 0.1 otherwise
+    node_weights = np.where(is_top100, 1.0, 0.1)
     
-    total_edges = sum(len(edges) for edges in optimized_graph.values())
-    print(f"Total edges: {total_edges}")
+    # next_top100[i] is the first top-100 node at or after loop position i,
+    # wrapping around the end of the loop
+    top100_positions = np.flatnonzero(is_top100[loop])
+    first_after = np.searchsorted(top100_positions, np.arange(num_nodes))
+    next_top100 = loop[top100_positions[first_after % len(top100_positions)]]
+    
+    # Add edges: next node and/or next top-100 node. A shortcut is only
+    # needed when the next node is not top-100, and is skipped when the
+    # only top-100 node left is the source itself.
+    next_nodes = np.roll(loop, -1)
+    shortcuts = np.roll(next_top100, -2)
+    needs_shortcut = ~is_top100[next_nodes] & (shortcuts != loop)
+    sources = np.concatenate([loop, loop[needs_shortcut]])
+    targets = np.concatenate([next_nodes, shortcuts[needs_shortcut]])
+    
+    indptr, indices, weights = edges_to_csr(
+        sources, targets, node_weights[targets], num_nodes
+    )
+    print(f"Total edges: {indptr[-1]}")
     
     # =============================================================
     # End of your implementation
     # =============================================================
 
     # Verify constraints
-    if not verify_constraints(optimized_graph, max_edges_per_node, max_total_edges):
+    if not verify_constraints_csr(
+        indptr, indices, weights, max_edges_per_node, max_total_edges
+    ):
         print("WARNING: Your optimized graph does not meet the constraints!")
         print("The evaluation script will reject it. Please fix the issues.")
 
+    # Convert to the nested-dict format expected by the evaluator
+    optimized_graph = csr_to_graph(indptr, indices, weights)
+
     return optimized_graph
 
 